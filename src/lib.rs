@@ -193,6 +193,25 @@ impl Tetromino {
     }
 }
 
+// Reward shaping used by Tetris::take_reward, selectable over the FFI by id
+#[derive(Debug, Default, Clone, Copy, PartialEq, Eq)]
+pub enum RewardShape {
+    #[default]
+    ScoreDelta,   // 0: score gained
+    LinesSquared, // 1: (score gained)^2, i.e. lines cleared squared
+    HolesPenalty, // 2: score gained, minus 0.01 per hole on the board
+}
+
+impl RewardShape {
+    pub fn from_id(id: u32) -> Self {
+        match id {
+            1 => RewardShape::LinesSquared,
+            2 => RewardShape::HolesPenalty,
+            _ => RewardShape::ScoreDelta,
+        }
+    }
+}
+
 #[derive(Debug, Store)]
 pub struct Tetris {
     pub width: u32,
@@ -208,11 +227,14 @@ pub struct Tetris {
     paused: bool,
     pub lines_being_cleared: Option<Vec<usize>>, // Made pub for tests/main.rs direct access
     pub animation_start_time: Option<f64>, // Made pub for tests/main.rs direct access
+    prev_score: i32, // Score at the last take_reward call, for RL rewards
+    board: Vec<u8>, // Cached 0/1 board for FFI readers, refreshed by apply_action and reset
+    pub reward_shape: RewardShape, // Kept across reset
 }
 
 impl Tetris {
     pub fn new(width: u32, height: u32) -> Self {
-        Self {
+        let mut tetris = Self {
             width,
             height,
             fixed_blocks: vec![],
@@ -224,7 +246,24 @@ impl Tetris {
             paused: false,
             lines_being_cleared: None,
             animation_start_time: None,
-        }
+            prev_score: 0,
+            board: vec![0; (width * height) as usize],
+            reward_shape: RewardShape::default(),
+        };
+        tetris.refresh_board();
+        tetris
+    }
+
+    // Starts a new game with the same dimensions. Unlike assigning Tetris::new,
+    // this keeps the cached board allocation, so pointers from board() stay valid.
+    pub fn reset(&mut self) {
+        let board = std::mem::take(&mut self.board);
+        *self = Tetris {
+            board,
+            reward_shape: self.reward_shape,
+            ..Tetris::new(self.width, self.height)
+        };
+        self.refresh_board();
     }
 
     pub fn render_view(&self) -> Vec<Vec<&'static str>> {
@@ -513,6 +552,97 @@ impl Tetris {
     pub fn is_paused(&self) -> bool {
         self.paused
     }
+
+    // Applies an RL-style action: 0:left, 1:right, 2:rotate, 3:drop, 4:tick.
+    // Any u32 is accepted and wrapped modulo 5, so FFI callers never need to
+    // validate actions themselves.
+    pub fn apply_action(&mut self, action: u32) {
+        match action % 5 {
+            0 => self.move_left(),
+            1 => self.move_right(),
+            2 => self.rotate(),
+            3 => self.speed_up(),
+            _ => self.tick(),
+        }
+        self.refresh_board();
+    }
+
+    // Cached board as written by fill_board. Only kept up to date by
+    // apply_action and reset; the allocation lives as long as the game.
+    pub fn board(&self) -> &[u8] {
+        &self.board
+    }
+
+    fn refresh_board(&mut self) {
+        let mut board = std::mem::take(&mut self.board);
+        self.fill_board(&mut board);
+        self.board = board;
+    }
+
+    // RL reward for the transition since the previous call: the reward_shape
+    // term, minus a small per-step penalty, minus a large penalty once the game
+    // is lost.
+    pub fn take_reward(&mut self) -> f64 {
+        let lines_cleared = (self.score - self.prev_score) as f64;
+        let mut reward = match self.reward_shape {
+            RewardShape::ScoreDelta => lines_cleared,
+            RewardShape::LinesSquared => lines_cleared * lines_cleared,
+            RewardShape::HolesPenalty => lines_cleared - 0.01 * self.count_holes() as f64,
+        };
+        reward -= 0.01;
+        if self.lost {
+            reward -= 100.0;
+        }
+        self.prev_score = self.score;
+        reward
+    }
+
+    // Empty cells below the topmost fixed block of their column
+    pub fn count_holes(&self) -> u32 {
+        let mut occupied = vec![vec![false; self.height as usize]; self.width as usize];
+        for block in &self.fixed_blocks {
+            for pos in &block.collect_positions() {
+                if pos.1 >= 0 && pos.1 < self.height as i32 && pos.0 >= 0 && pos.0 < self.width as i32 {
+                    occupied[pos.0 as usize][pos.1 as usize] = true;
+                }
+            }
+        }
+        occupied
+            .iter()
+            .map(|column| match column.iter().position(|&c| c) {
+                Some(top) => column[top..].iter().filter(|&&c| !c).count() as u32,
+                None => 0,
+            })
+            .sum()
+    }
+
+    // Writes the board row-major into `out` (len >= width * height): 1 for
+    // occupied cells (fixed blocks and the falling piece), 0 for empty/ghost.
+    pub fn fill_board(&self, out: &mut [u8]) {
+        let board_view = self.render_view();
+        let mut buffer_idx = 0;
+        for row in &board_view {
+            for &cell in row {
+                out[buffer_idx] = match cell {
+                    "B" | "G" => 0,
+                    _ => 1,
+                };
+                buffer_idx += 1;
+            }
+        }
+    }
+
+    // Same as fill_board but packs 8 cells per byte, row-major and most
+    // significant bit first (len >= ceil(width * height / 8)).
+    pub fn fill_board_packed(&self, out: &mut [u8]) {
+        let len = ((self.width * self.height) as usize + 7) / 8;
+        out[..len].fill(0);
+        for (i, &cell) in self.render_view().iter().flatten().enumerate() {
+            if !matches!(cell, "B" | "G") {
+                out[i / 8] |= 0x80 >> (i % 8);
+            }
+        }
+    }
 }
 
 
@@ -526,6 +656,17 @@ pub struct GameState {
     height: u32,
 }
 
+impl GameState {
+    // Packs the state into a single u64 so it crosses the FFI as a primitive:
+    // bits 0..32 score, bit 32 lost, bits 33..48 width, bits 48..64 height.
+    fn to_u64(&self) -> u64 {
+        (self.score as u32 as u64)
+            | ((self.lost as u64) << 32)
+            | (((self.width & 0x7FFF) as u64) << 33)
+            | (((self.height & 0xFFFF) as u64) << 48)
+    }
+}
+
 #[no_mangle]
 pub unsafe extern "C" fn tetris_create(width: u32, height: u32) -> *mut Tetris {
     let tetris = Tetris::new(width, height);
@@ -546,9 +687,9 @@ pub unsafe extern "C" fn tetris_reset(ptr: *mut Tetris) {
     if ptr.is_null() {
         return;
     }
-    // unsafe block already present for ptr write and dereference
-    let new_tetris_instance = Tetris::new((*ptr).width, (*ptr).height);
-    std::ptr::write(ptr, new_tetris_instance);
+    // Resets in place, dropping the old game state but keeping the board buffer
+    // that tetris_board_ptr hands out
+    (*ptr).reset();
 }
 
 #[no_mangle]
@@ -566,27 +707,45 @@ pub unsafe extern "C" fn tetris_get_game_state(ptr: *const Tetris) -> GameState
     }
 }
 
+#[no_mangle]
+pub unsafe extern "C" fn tetris_set_reward_shape(ptr: *mut Tetris, shape_id: u32) {
+    // Selects the RewardShape (by id, see RewardShape::from_id) used by
+    // tetris_step_rl and tetris_step_autoreset; survives tetris_reset.
+    if ptr.is_null() {
+        return;
+    }
+    (*ptr).reward_shape = RewardShape::from_id(shape_id);
+}
+
 #[no_mangle]
 pub unsafe extern "C" fn tetris_get_board(ptr: *const Tetris, out_board_buffer: *mut u8) {
     if ptr.is_null() || out_board_buffer.is_null() {
         return;
     }
-    // unsafe block already present for ptr dereference and buffer write
+    // Every FFI mutation goes through apply_action or reset, so the cached board is current
     let tetris = &*ptr;
-    let board_view = tetris.render_view();
+    let board = tetris.board();
+    std::slice::from_raw_parts_mut(out_board_buffer, board.len()).copy_from_slice(board);
+}
 
-    let mut buffer_idx = 0;
-    for r in 0..tetris.height as usize {
-        for c in 0..tetris.width as usize {
-            let cell = board_view[r][c];
-            let val = match cell {
-                "B" | "G" => 0,
-                _ => 1,
-            };
-            *out_board_buffer.add(buffer_idx) = val;
-            buffer_idx += 1;
-        }
+#[no_mangle]
+pub unsafe extern "C" fn tetris_board_ptr(ptr: *const Tetris) -> *const u8 {
+    // Pointer to the game's own width * height board, row-major. Valid until
+    // tetris_destroy; its contents change on every step and reset.
+    if ptr.is_null() {
+        return std::ptr::null();
     }
+    (*ptr).board().as_ptr()
+}
+
+#[no_mangle]
+pub unsafe extern "C" fn tetris_get_board_packed(ptr: *const Tetris, out_packed_buffer: *mut u8) {
+    if ptr.is_null() || out_packed_buffer.is_null() {
+        return;
+    }
+    let tetris = &*ptr;
+    let len = ((tetris.width * tetris.height) as usize + 7) / 8;
+    tetris.fill_board_packed(std::slice::from_raw_parts_mut(out_packed_buffer, len));
 }
 
 #[no_mangle]
@@ -597,19 +756,221 @@ pub unsafe extern "C" fn tetris_step(ptr: *mut Tetris, action: u32) -> GameState
     // unsafe block already present for ptr dereference
     let tetris = &mut *ptr;
 
-    match action {
-        0 => tetris.move_left(),
-        1 => tetris.move_right(),
-        2 => tetris.rotate(),
-        3 => tetris.speed_up(),
-        4 => tetris.tick(),
-        _ => {}
-    }
+    tetris.apply_action(action);
     // Call to another unsafe extern "C" function, or rely on its own internal unsafety.
     // For consistency, the call itself isn't in an unsafe block here as tetris_get_game_state handles its own ptr.
     tetris_get_game_state(ptr as *const Tetris)
 }
 
+#[no_mangle]
+pub unsafe extern "C" fn tetris_step_full(ptr: *mut Tetris, action: u32, out_board_buffer: *mut u8) -> GameState {
+    // Same as tetris_step, but also writes the resulting board into out_board_buffer
+    // so callers need only one FFI crossing per step.
+    let state = tetris_step(ptr, action);
+    tetris_get_board(ptr as *const Tetris, out_board_buffer);
+    state
+}
+
+#[no_mangle]
+pub unsafe extern "C" fn tetris_step_u64(ptr: *mut Tetris, action: u32, out_board_buffer: *mut u8) -> u64 {
+    // Same as tetris_step_full but returns the state packed by GameState::to_u64.
+    // out_board_buffer may be null to skip writing the board.
+    tetris_step_full(ptr, action, out_board_buffer).to_u64()
+}
+
+#[no_mangle]
+pub unsafe extern "C" fn tetris_step_rl(
+    ptr: *mut Tetris,
+    action: u32,
+    out_board_buffer: *mut u8,
+    out_reward: *mut f64,
+) -> u64 {
+    // Same as tetris_step_u64, and also writes the step reward (see
+    // Tetris::take_reward) into out_reward.
+    let packed_state = tetris_step_u64(ptr, action, out_board_buffer);
+    if !ptr.is_null() && !out_reward.is_null() {
+        *out_reward = (*ptr).take_reward();
+    }
+    packed_state
+}
+
+#[no_mangle]
+pub unsafe extern "C" fn tetris_step_autoreset(
+    ptr: *mut Tetris,
+    action: u32,
+    out_board_buffer: *mut u8,
+    out_reward: *mut f64,
+) -> u64 {
+    // Same as tetris_step_rl, but a step that loses the game also resets it, and
+    // out_board_buffer receives the first board of the new game. The returned
+    // state and reward still describe the terminal step.
+    let packed_state = tetris_step_rl(ptr, action, out_board_buffer, out_reward);
+    if !ptr.is_null() && (*ptr).lost {
+        tetris_reset(ptr);
+        tetris_get_board(ptr as *const Tetris, out_board_buffer);
+    }
+    packed_state
+}
+
+#[no_mangle]
+pub unsafe extern "C" fn tetris_batch_step(
+    handles: *const *mut Tetris,
+    actions: *const u32,
+    out_boards: *mut u8,
+    out_states: *mut GameState,
+    out_rewards: *mut f64,
+    auto_reset: bool,
+    packed: bool,
+    n: u32,
+) {
+    // Steps n games in one FFI crossing. Boards are written back to back into
+    // out_boards (each width * height bytes, or ceil(width * height / 8) bytes
+    // as in tetris_get_board_packed if packed is set), states into out_states[i]
+    // and, unless out_rewards is null, rewards (see Tetris::take_reward) into
+    // out_rewards[i]. With auto_reset, a game lost on this step is reset in
+    // place as in tetris_step_autoreset: its board slot holds the new game, its
+    // state and reward slots still describe the terminal step.
+    if handles.is_null() || actions.is_null() || out_boards.is_null() || out_states.is_null() {
+        return;
+    }
+    let mut board_offset = 0;
+    for i in 0..n as usize {
+        let ptr = *handles.add(i);
+        *out_states.add(i) = tetris_step(ptr, *actions.add(i));
+        if ptr.is_null() {
+            continue;
+        }
+        if !out_rewards.is_null() {
+            *out_rewards.add(i) = (*ptr).take_reward();
+        }
+        if auto_reset && (*ptr).lost {
+            tetris_reset(ptr);
+        }
+        // The board is written once, after any reset
+        let out_board = out_boards.add(board_offset);
+        let cells = ((*ptr).width * (*ptr).height) as usize;
+        if packed {
+            tetris_get_board_packed(ptr as *const Tetris, out_board);
+            board_offset += (cells + 7) / 8;
+        } else {
+            tetris_get_board(ptr as *const Tetris, out_board);
+            board_offset += cells;
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn single_block(x: i32, y: i32) -> Tetromino {
+        Tetromino {
+            kind: "I",
+            data: TetrominoData {
+                position: Position(x, y),
+                data: [Position(0, 0)].into(),
+            },
+            rotation: 0,
+        }
+    }
+
+    // 4x4 board with no falling piece; column 0 has two holes under its top block:
+    // . . . .
+    // X . . .
+    // . . X .
+    // . X X .
+    fn board_with_holes() -> Tetris {
+        let mut tetris = Tetris::new(4, 4);
+        tetris.current_tetromino = None;
+        tetris.fixed_blocks.clear();
+        for (x, y) in [(0, 1), (1, 3), (2, 2), (2, 3)] {
+            tetris.fixed_blocks.push(single_block(x, y));
+        }
+        tetris
+    }
+
+    fn assert_close(actual: f64, expected: f64) {
+        assert!((actual - expected).abs() < 1e-9, "{actual} != {expected}");
+    }
+
+    #[test]
+    fn test_apply_action_wraps_out_of_range_actions() {
+        // Pairs of actions that must act alike; 3 (speed_up) is left out since
+        // landing a piece spawns a random one
+        for (action, wrapped) in [(0, 5), (1, 6), (2, 7), (4, 9), (0, u32::MAX)] {
+            let mut expected = Tetris::new(10, 20);
+            let mut actual = Tetris::new(10, 20);
+            actual.current_tetromino = expected.current_tetromino.clone();
+            expected.apply_action(action);
+            actual.apply_action(wrapped);
+            assert_eq!(actual.board(), expected.board(), "action {wrapped}");
+        }
+    }
+
+    #[test]
+    fn test_fill_board_packed_matches_fill_board() {
+        let mut tetris = Tetris::new(10, 20);
+        for action in [0, 2, 4, 3, 1, 4] {
+            tetris.apply_action(action);
+            let mut board = vec![0u8; 10 * 20];
+            let mut packed = vec![0u8; (10 * 20 + 7) / 8];
+            tetris.fill_board(&mut board);
+            tetris.fill_board_packed(&mut packed);
+            for (i, &cell) in board.iter().enumerate() {
+                assert_eq!((packed[i / 8] >> (7 - i % 8)) & 1, cell, "cell {i}");
+            }
+        }
+    }
+
+    #[test]
+    fn test_count_holes() {
+        assert_eq!(board_with_holes().count_holes(), 2);
+
+        let mut tetris = board_with_holes();
+        tetris.fixed_blocks.clear();
+        assert_eq!(tetris.count_holes(), 0);
+    }
+
+    #[test]
+    fn test_take_reward_shapes() {
+        let rewards: Vec<f64> = [
+            RewardShape::ScoreDelta,
+            RewardShape::LinesSquared,
+            RewardShape::HolesPenalty,
+        ]
+        .into_iter()
+        .map(|shape| {
+            let mut tetris = board_with_holes();
+            tetris.reward_shape = shape;
+            tetris.score = 2; // Two lines cleared since the last reward
+            tetris.take_reward()
+        })
+        .collect();
+
+        assert_close(rewards[0], 2.0 - 0.01);
+        assert_close(rewards[1], 4.0 - 0.01);
+        assert_close(rewards[2], 2.0 - 0.01 * 2.0 - 0.01);
+        assert!(
+            rewards[2] < rewards[0],
+            "holes must lower the holes_penalty reward"
+        );
+    }
+
+    #[test]
+    fn test_take_reward_tracks_score_and_loss() {
+        let mut tetris = board_with_holes();
+        tetris.score = 1;
+        assert_close(tetris.take_reward(), 1.0 - 0.01);
+        assert_close(tetris.take_reward(), -0.01); // Score already rewarded
+
+        tetris.lost = true;
+        assert_close(tetris.take_reward(), -0.01 - 100.0);
+
+        tetris.reset();
+        assert_close(tetris.take_reward(), -0.01);
+    }
+}
+
 // Placeholder for ANIMATION_DURATION if it's meant to be used by FFI or lib consumers
 // pub const FFI_ANIMATION_DURATION: u32 = ANIMATION_DURATION;
 // Or make it part of GameState if relevant to C consumers.
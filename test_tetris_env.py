@@ -1,64 +1,81 @@
+import contextlib
+import ctypes
+import io
+import threading
+import time
 import unittest
 import numpy as np
 import gymnasium as gym
 from gymnasium.utils.env_checker import check_env
-from tetris_env import TetrisEnv # Assuming tetris_env.py is in the same directory
+from tetris_env import NativeTetrisEnv, TetrisEnv, VecTetrisEnv, make_env, _core, _DEFAULT_LIB # Assuming tetris_env.py is in the same directory
 import os
 import platform
 
+def find_or_build_lib() -> str:
+    """Return the path to the compiled Rust library, building it with cargo if missing."""
+    lib_name = _DEFAULT_LIB # Platform-specific name resolved by tetris_env at import
+    if lib_name is None:
+        raise OSError(f"Unsupported OS for testing: {platform.system()}")
+
+    # Assuming tests are run from the project root where target/debug is a subdirectory
+    # This path should align with where `cargo build` places the dynamic library.
+    # If tetris_env.py is also in the root, this path structure is consistent with TetrisEnv's default.
+    lib_path = os.path.join(os.getcwd(), "target", "debug", lib_name)
+
+    if not os.path.exists(lib_path):
+        # Attempt to build the library if it's missing, useful for CI/first run
+        # This assumes `cargo` is in PATH and the current working directory is the project root.
+        print(f"Library not found at {lib_path}. Attempting to build Rust library...")
+        try:
+            import subprocess
+            # Ensure we are in the project root for cargo build
+            project_root = os.getcwd() # Or determine more robustly if needed
+            subprocess.run(["cargo", "build"], check=True, cwd=project_root, capture_output=True)
+            print("Rust library built successfully.")
+            if not os.path.exists(lib_path): # Check again after build
+                 raise FileNotFoundError(f"Library still not found at {lib_path} after attempting build.")
+        except FileNotFoundError as e: # cargo not found
+            print(f"Error: 'cargo' command not found. Please ensure Rust is installed and in PATH. {e}")
+            raise e
+        except subprocess.CalledProcessError as e:
+            print(f"Error building Rust library with Cargo: {e}")
+            print(f"Stdout: {e.stdout.decode()}")
+            print(f"Stderr: {e.stderr.decode()}")
+            raise e
+        except Exception as e:
+            print(f"An unexpected error occurred during library build attempt: {e}")
+            raise e
+
+    return lib_path
+
+
+def play_until_loss(env, max_steps: int = 100) -> tuple:
+    """Drop pieces until a game is lost; return that step's (obs, reward, terminated, truncated, info).
+
+    Works for batched envs too, where it returns once any env is lost.
+    """
+    for _ in range(max_steps):
+        step = env.step(3)
+        if np.any(step[2]):
+            return step
+    raise AssertionError("Game did not terminate within the given steps.")
+
+
 class TestTetrisEnv(unittest.TestCase):
-    def setUp(self):
-        """Set up the test environment before each test."""
-        lib_name = None
-        system = platform.system()
-
-        if system == "Linux":
-            lib_name = "libtetris_core.so"
-        elif system == "Windows":
-            lib_name = "tetris_core.dll"
-        elif system == "Darwin": # macOS
-            lib_name = "libtetris_core.dylib"
-        else:
-            raise OSError(f"Unsupported OS for testing: {system}")
-
-        # Assuming tests are run from the project root where target/debug is a subdirectory
-        # This path should align with where `cargo build` places the dynamic library.
-        # If tetris_env.py is also in the root, this path structure is consistent with TetrisEnv's default.
-        self.lib_path = os.path.join(os.getcwd(), "target", "debug", lib_name)
-
-        if not os.path.exists(self.lib_path):
-            # Attempt to build the library if it's missing, useful for CI/first run
-            # This assumes `cargo` is in PATH and the current working directory is the project root.
-            print(f"Library not found at {self.lib_path}. Attempting to build Rust library...")
-            try:
-                import subprocess
-                # Ensure we are in the project root for cargo build
-                project_root = os.getcwd() # Or determine more robustly if needed
-                subprocess.run(["cargo", "build"], check=True, cwd=project_root, capture_output=True)
-                print("Rust library built successfully.")
-                if not os.path.exists(self.lib_path): # Check again after build
-                     raise FileNotFoundError(f"Library still not found at {self.lib_path} after attempting build.")
-            except FileNotFoundError as e: # cargo not found
-                print(f"Error: 'cargo' command not found. Please ensure Rust is installed and in PATH. {e}")
-                raise e
-            except subprocess.CalledProcessError as e:
-                print(f"Error building Rust library with Cargo: {e}")
-                print(f"Stdout: {e.stdout.decode()}")
-                print(f"Stderr: {e.stderr.decode()}")
-                raise e
-            except Exception as e:
-                print(f"An unexpected error occurred during library build attempt: {e}")
-                raise e
-
-
-        self.env = TetrisEnv(lib_path=self.lib_path, width=10, height=20)
-
-    def tearDown(self):
-        """Clean up the test environment after each test."""
-        self.env.close()
+    @classmethod
+    def setUpClass(cls):
+        """Load the library and create one environment shared by all tests; each test resets it."""
+        cls.lib_path = find_or_build_lib()
+        cls.env = TetrisEnv(lib_path=cls.lib_path, width=10, height=20)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up the shared environment after all tests."""
+        cls.env.close()
 
     def test_initialization(self):
         """Test if the environment initializes correctly."""
+        self.env.reset()
         self.assertIsNotNone(self.env)
         self.assertIsInstance(self.env.observation_space, gym.spaces.Box)
         self.assertEqual(self.env.observation_space.shape, (20, 10))
@@ -98,6 +115,79 @@ class TestTetrisEnv(unittest.TestCase):
             if terminated: # If game ends early, no need to continue testing all actions
                 break
 
+    def test_obs_without_copy(self):
+        """Test that copy_obs=False returns the internal buffer instead of copies."""
+        env = TetrisEnv(lib_path=self.lib_path, width=10, height=20, copy_obs=False)
+        self.addCleanup(env.close)
+        obs_reset, _ = env.reset()
+        obs_step, *_ = env.step(4)
+        self.assertIs(obs_reset, obs_step)
+        np.testing.assert_array_equal(obs_step, env._get_obs())
+        env.close()
+        self.assertIsNone(env._board, "The view of the freed board must be dropped on close")
+
+        obs_a, _ = self.env.reset()
+        obs_b, *_ = self.env.step(4)
+        self.assertFalse(np.shares_memory(obs_a, obs_b))
+
+    def test_ansi_render(self):
+        """Test that the ANSI render matches the observation cell by cell."""
+        env = TetrisEnv(lib_path=self.lib_path, width=10, height=20, render_mode="ansi")
+        self.addCleanup(env.close)
+        env.reset()
+        obs, *_ = env.step(4)
+        lines = env.render().split("\n")
+        self.assertEqual(len(lines), 21)
+        expected = ["".join("#" if cell else "." for cell in row) for row in obs]
+        self.assertEqual(lines[:20], expected)
+        self.assertTrue(lines[20].startswith("Score: "))
+
+    def test_human_render(self):
+        """Test that human-mode frames reach stdout through the writer thread, newest frame last."""
+        stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        env = TetrisEnv(lib_path=self.lib_path, width=10, height=20, render_mode="human")
+        self.addCleanup(env.close)
+        with contextlib.redirect_stdout(stdout):
+            env.reset()
+            for _ in range(10): # Faster than the writer, so some frames are dropped
+                obs, reward, terminated, truncated, info = env.step(4)
+            env.close() # Flushes the pending frame before returning
+        stdout.flush()
+
+        frames = stdout.buffer.getvalue().decode().split("\033[H\033[J")
+        self.assertEqual(frames[0], "", "Each frame should start by clearing the screen")
+        self.assertLessEqual(len(frames) - 1, 11)
+        lines = frames[-1].split("\n")
+        self.assertEqual(len(lines), 20 + 3) # Board rows, score line, separator, trailing newline
+        expected = ["".join("⬜️" if cell else "⬛️" for cell in row) for row in obs]
+        self.assertEqual(lines[:20], expected)
+        self.assertEqual(lines[20], f"Score: {info['score']} | Lost: {info['lost']}")
+        self.assertEqual(lines[21], "-" * 20)
+
+    def test_human_render_close_with_broken_stdout(self):
+        """Test that close() returns promptly when writing frames to stdout fails."""
+        class BrokenStdout:
+            def write(self, data):
+                raise BrokenPipeError
+            flush = write
+
+        env = TetrisEnv(lib_path=self.lib_path, width=10, height=20, render_mode="human")
+        self.addCleanup(env.close)
+        with contextlib.redirect_stdout(BrokenStdout()):
+            env.reset()
+            deadline = time.monotonic() + 1.0
+            while not env._render_queue.empty() and time.monotonic() < deadline:
+                time.sleep(0.01) # Let the writer take the first frame and fail on it
+            env.step(4) # Queued after the failure; a dead writer would never take it
+            writer = env._render_thread
+            start = time.monotonic()
+            closer = threading.Thread(target=env.close, daemon=True)
+            closer.start()
+            closer.join(timeout=5.0)
+        self.assertFalse(closer.is_alive(), "close() hung on the render queue")
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertFalse(writer.is_alive())
+
     def test_random_rollout(self):
         """Test a short rollout with random actions."""
         obs, info = self.env.reset()
@@ -130,11 +220,75 @@ class TestTetrisEnv(unittest.TestCase):
         # not wrapped, if wrappers are ever added. self.env.unwrapped is good practice.
         # skip_render_check=True because console rendering is hard to check automatically
         # and might require specific terminal capabilities.
+        self.env.reset()
         try:
             check_env(self.env.unwrapped, skip_render_check=True)
         except Exception as e:
             self.fail(f"check_env failed: {e}")
 
+    def test_auto_reset(self):
+        """Test that auto_reset starts a new game on the terminal step."""
+        env = TetrisEnv(lib_path=self.lib_path, width=10, height=20, auto_reset=True)
+        self.addCleanup(env.close)
+        env.reset()
+        obs, reward, terminated, truncated, info = play_until_loss(env)
+        self.assertTrue(reward <= -100.0)
+        self.assertTrue(info["lost"])
+        self.assertLess(obs.sum(), 10, "Observation should be the fresh board of the new game")
+        self.assertFalse(env._get_info()["lost"], "Info after the step should describe the new game")
+
+        obs, reward, terminated, truncated, info = env.step(4)
+        self.assertFalse(terminated)
+        self.assertEqual(info["score"], 0)
+
+    def test_reward_shaping(self):
+        """Test the built-in reward shapes and a custom reward_fn."""
+        with self.assertRaises(ValueError):
+            TetrisEnv(lib_path=self.lib_path, reward_shape="no_such_shape")
+
+        # Exact values per board are covered by the Rust tests for Tetris::take_reward;
+        # here each shape is checked against the score delta it was given
+        for shape in ("lines_squared", "holes_penalty"):
+            env = TetrisEnv(lib_path=self.lib_path, reward_shape=shape)
+            self.addCleanup(env.close)
+            _, info = env.reset()
+            prev_score = info["score"]
+            for _ in range(20):
+                obs, reward, terminated, truncated, info = env.step(3)
+                self.assertIsInstance(reward, float)
+                lines = info["score"] - prev_score
+                prev_score = info["score"]
+                penalty = 0.01 + (100.0 if terminated else 0.0)
+                if shape == "lines_squared":
+                    self.assertAlmostEqual(reward, lines ** 2 - penalty)
+                else:
+                    self.assertLessEqual(reward, lines - penalty + 1e-9)
+                if terminated:
+                    break
+
+        calls = []
+        def reward_fn(board, score_delta, lost):
+            calls.append((board.shape, score_delta, lost))
+            return 1.5
+
+        env = TetrisEnv(lib_path=self.lib_path, reward_fn=reward_fn)
+        self.addCleanup(env.close)
+        env.reset()
+        obs, reward, terminated, truncated, info = env.step(4)
+        self.assertEqual(reward, 1.5)
+        self.assertEqual(calls, [((20, 10), 0, False)])
+
+        # With auto_reset, reward_fn still sees the board that lost
+        seen = []
+        env = TetrisEnv(lib_path=self.lib_path, auto_reset=True,
+                        reward_fn=lambda board, score_delta, lost: seen.append(int(board.sum())) or 0.0)
+        self.addCleanup(env.close)
+        env.reset()
+        obs, *_ = play_until_loss(env)
+        self.assertGreater(seen[-1], 10)
+        self.assertLess(obs.sum(), 10, "Observation should be the fresh board of the new game")
+        self.assertFalse(env._get_info()["lost"])
+
     def test_game_over_reward_check(self):
         """Test that reward is significantly negative upon game over."""
         self.env.reset()
@@ -165,6 +319,106 @@ class TestTetrisEnv(unittest.TestCase):
 
         self.assertTrue(terminated, "Game did not terminate within the given steps for game_over test.")
 
+    def test_make_env_options(self):
+        """Test that make_env forwards the TetrisEnv options to the ctypes env."""
+        env = make_env(lib_path=self.lib_path, copy_obs=False, auto_reset=True, reward_shape="lines_squared")
+        self.addCleanup(env.close)
+        self.assertIsInstance(env, TetrisEnv)
+        self.assertFalse(env.copy_obs)
+        self.assertTrue(env.auto_reset)
+        self.assertEqual(env.reward_shape, "lines_squared")
+
+
+@unittest.skipUnless(_core is not None, "tetris_core_py extension is not installed")
+class TestNativeTetrisEnv(unittest.TestCase):
+    def test_make_env_options(self):
+        """Test that make_env builds a NativeTetrisEnv that honours the TetrisEnv options."""
+        env = make_env(copy_obs=False, auto_reset=True, reward_shape="lines_squared")
+        self.addCleanup(env.close)
+        self.assertIsInstance(env, NativeTetrisEnv)
+        env.reset()
+        obs, reward, *_ = play_until_loss(env)
+        self.assertLessEqual(reward, -100.0)
+        self.assertLess(obs.sum(), 10, "Observation should be the fresh board of the new game")
+
+    def test_reward_fn(self):
+        """Test that a custom reward_fn replaces the Rust reward."""
+        env = NativeTetrisEnv(reward_fn=lambda board, score_delta, lost: 1.5)
+        self.addCleanup(env.close)
+        env.reset()
+        obs, reward, terminated, truncated, info = env.step(4)
+        self.assertEqual(reward, 1.5)
+
+
+class TestVecTetrisEnv(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Create a small batch of environments shared by all tests; each test resets it."""
+        cls.num_envs = 4
+        cls.envs = VecTetrisEnv(cls.num_envs, lib_path=find_or_build_lib(), width=10, height=20)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.envs.close()
+
+    def test_reset(self):
+        """Test that reset returns stacked observations and per-env infos."""
+        obs, info = self.envs.reset()
+        self.assertEqual(obs.shape, (self.num_envs, 20, 10))
+        self.assertEqual(obs.dtype, np.uint8)
+        np.testing.assert_array_equal(info["score"], np.zeros(self.num_envs))
+        self.assertFalse(info["lost"].any())
+
+    def test_step(self):
+        """Test that a batched step returns arrays with a leading num_envs axis."""
+        self.envs.reset()
+        actions = np.arange(self.num_envs) % self.envs.single_action_space.n
+        obs, rewards, terminated, truncated, info = self.envs.step(actions)
+
+        self.assertEqual(obs.shape, (self.num_envs, 20, 10))
+        self.assertEqual(rewards.shape, (self.num_envs,))
+        self.assertEqual(terminated.dtype, bool)
+        self.assertEqual(truncated.shape, (self.num_envs,))
+        self.assertEqual(info["score"].shape, (self.num_envs,))
+
+    def test_reward_shape(self):
+        """Test that batched rewards come from Rust with the selected reward shape."""
+        with self.assertRaises(ValueError):
+            VecTetrisEnv(1, lib_path=find_or_build_lib(), reward_shape="no_such_shape")
+
+        self.envs.reset()
+        obs, rewards, terminated, truncated, info = self.envs.step(np.full(self.num_envs, 4))
+        self.assertEqual(rewards.dtype, np.float64)
+        np.testing.assert_allclose(rewards[~terminated], -0.01)
+
+    def test_packed_obs(self):
+        """Test that packed observations unpack to the games' boards."""
+        envs = VecTetrisEnv(self.num_envs, lib_path=find_or_build_lib(), packed_obs=True)
+        self.addCleanup(envs.close)
+        obs, _ = envs.reset()
+        self.assertEqual(obs.shape, (self.num_envs, (20 * 10 + 7) // 8))
+        board = np.zeros((20, 10), dtype=np.uint8)
+        for action in [0, 2, 4, 3, 1, 4]:
+            obs, *_ = envs.step(np.full(self.num_envs, action))
+            for i, game in enumerate(envs._handles):
+                envs._c_get_board(game, board.ctypes.data_as(ctypes.POINTER(ctypes.c_uint8)))
+                np.testing.assert_array_equal(envs.unpack(obs)[i], board)
+
+    def test_game_over_penalty(self):
+        """Test that only the envs that lost receive the game over penalty."""
+        self.envs.reset()
+        obs, rewards, terminated, truncated, info = play_until_loss(self.envs)
+        self.assertTrue((rewards[terminated] <= -100.0).all())
+        self.assertTrue((rewards[~terminated] > -100.0).all())
+
+        # The lost games were reset in place and carry on from a score of 0
+        lost = terminated
+        self.assertTrue((obs[lost].sum(axis=(1, 2)) < 10).all())
+        obs, rewards, terminated, truncated, info = self.envs.step(np.full(self.num_envs, 4))
+        self.assertFalse(terminated[lost].any())
+        np.testing.assert_array_equal(info["score"][lost], 0)
+        self.assertTrue((rewards[lost] > -100.0).all())
+
+
 if __name__ == '__main__':
     unittest.main()
-```
@@ -0,0 +1,68 @@
+use numpy::{PyArray1, PyArray2, PyArrayMethods};
+use pyo3::prelude::*;
+use tetris_core::{RewardShape, Tetris};
+
+// PyO3 bindings for the Tetris core. Unlike the ctypes FFI in src/lib.rs,
+// these are real extension methods, so each call skips ctypes' argument
+// marshaling and returns numpy arrays directly.
+
+#[pyclass(unsendable)]
+struct Game {
+    inner: Tetris,
+}
+
+impl Game {
+    fn board_array<'py>(&self, py: Python<'py>) -> Bound<'py, PyArray2<u8>> {
+        let shape = [self.inner.height as usize, self.inner.width as usize];
+        PyArray1::from_slice_bound(py, self.inner.board())
+            .reshape(shape)
+            .expect("board buffer matches width * height")
+    }
+}
+
+#[pymethods]
+impl Game {
+    #[new]
+    fn new(width: u32, height: u32) -> Self {
+        Game {
+            inner: Tetris::new(width, height),
+        }
+    }
+
+    fn reset(&mut self) {
+        self.inner.reset();
+    }
+
+    // Selects the reward computed by step(), by RewardShape id.
+    fn set_reward_shape(&mut self, shape_id: u32) {
+        self.inner.reward_shape = RewardShape::from_id(shape_id);
+    }
+
+    // Returns (board, score, lost, reward) after applying `action`; the reward
+    // comes from Tetris::take_reward, as in the FFI tetris_step_rl.
+    fn step<'py>(
+        &mut self,
+        py: Python<'py>,
+        action: u32,
+    ) -> (Bound<'py, PyArray2<u8>>, i32, bool, f64) {
+        self.inner.apply_action(action);
+        let reward = self.inner.take_reward();
+        let board = self.board_array(py);
+        (board, self.inner.get_score(), self.inner.lost, reward)
+    }
+
+    fn get_board<'py>(&self, py: Python<'py>) -> Bound<'py, PyArray2<u8>> {
+        self.board_array(py)
+    }
+
+    // Returns (score, lost, width, height), mirroring the FFI GameState.
+    fn state(&self) -> (i32, bool, u32, u32) {
+        (self.inner.get_score(), self.inner.lost, self.inner.width, self.inner.height)
+    }
+}
+
+#[pymodule]
+fn tetris_core_py(m: &Bound<'_, PyModule>) -> PyResult<()> {
+    m.add_class::<Game>()?;
+    Ok(())
+}
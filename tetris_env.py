@@ -4,6 +4,18 @@ import gymnasium as gym
 from gymnasium import spaces
 import platform
 import os
+from typing import Callable, Optional
+import queue
+import sys
+import threading
+
+try:
+    # Optional PyO3 extension (see tetris_core_py/); lower per-call overhead than ctypes
+    import tetris_core_py as _core
+except ImportError:
+    _core = None
+if not hasattr(_core, "Game"): # Run from the repo root, the unbuilt crate imports as a namespace package
+    _core = None
 
 # Define the GameState structure for ctypes
 class GameState(ctypes.Structure):
@@ -14,56 +26,162 @@ class GameState(ctypes.Structure):
         ("height", ctypes.c_uint32),
     ]
 
+# Built-in reward shapes computed in Rust; ids match RewardShape::from_id
+REWARD_SHAPES = {"score_delta": 0, "lines_squared": 1, "holes_penalty": 2}
+
+def _reward_shape_id(reward_shape: str) -> int:
+    if reward_shape not in REWARD_SHAPES:
+        raise ValueError(f"Unknown reward_shape {reward_shape!r}. Expected one of {list(REWARD_SHAPES)}.")
+    return REWARD_SHAPES[reward_shape]
+
+def _decode_state(packed: int) -> tuple[int, bool, int, int]:
+    # Inverse of GameState::to_u64 on the Rust side
+    return (packed & 0xFFFFFFFF, bool((packed >> 32) & 1), (packed >> 33) & 0x7FFF, packed >> 48)
+
+# NumPy mirror of GameState, so arrays of states can be filled by Rust and read vectorially
+_GAME_STATE_DTYPE = np.dtype({
+    "names": [name for name, _ in GameState._fields_],
+    "formats": [np.int32, np.bool_, np.uint32, np.uint32],
+    "offsets": [getattr(GameState, name).offset for name, _ in GameState._fields_],
+    "itemsize": ctypes.sizeof(GameState),
+})
+
+# Platform-specific library name, resolved once at import (None on unsupported OSes)
+_SYS = platform.system()
+_LIB_NAMES = {"Linux": "libtetris_core.so", "Windows": "tetris_core.dll", "Darwin": "libtetris_core.dylib"}
+_DEFAULT_LIB = _LIB_NAMES.get(_SYS)
+_DEFAULT_LIB_DIR = os.path.join(os.path.dirname(__file__), "target", "debug")
+
+# Loaded libraries by path, so creating many envs does a single dlopen
+_CDLL_CACHE: dict[str, ctypes.CDLL] = {}
+
+def _resolve_lib_path(lib_path: str = None) -> str:
+    if lib_path is None:
+        if _DEFAULT_LIB is None:
+            raise OSError(f"Unsupported OS: {_SYS}. Please provide lib_path manually.")
+        lib_path = os.path.join(_DEFAULT_LIB_DIR, _DEFAULT_LIB)
+    return lib_path
+
+def _load_lib(lib_path: str) -> ctypes.CDLL:
+    rust_lib = _CDLL_CACHE.get(lib_path)
+    if rust_lib is None:
+        if not os.path.exists(lib_path):
+            raise OSError(f"Tetris library not found at {lib_path}. "
+                          "Ensure the Rust code is compiled and the path is correct.")
+        rust_lib = _CDLL_CACHE[lib_path] = ctypes.CDLL(lib_path)
+    return rust_lib
+
+def _render_worker(frames: queue.Queue):
+    # Writes rendered UTF-8 frames to stdout off the step loop, one write and one
+    # flush per frame; None stops the worker
+    broken = False
+    while True:
+        frame = frames.get()
+        if frame is None:
+            return
+        if broken: # Keep draining so producers never block on a dead stdout
+            continue
+        try:
+            out = getattr(sys.stdout, "buffer", None)
+            if out is not None:
+                out.write(frame)
+            else: # Text-only streams, e.g. notebooks or redirected test output
+                sys.stdout.write(frame.decode())
+            sys.stdout.flush()
+        except OSError: # e.g. BrokenPipeError when piped into `head`
+            broken = True
+
 class TetrisEnv(gym.Env):
     metadata = {'render_modes': ['human', 'ansi'], 'render_fps': 4}
 
-    def __init__(self, lib_path: str = None, width: int = 10, height: int = 20, render_mode: str = None):
+    def __init__(self, lib_path: str = None, width: int = 10, height: int = 20, render_mode: str = None,
+                 copy_obs: bool = True, auto_reset: bool = False, reward_shape: str = "score_delta",
+                 reward_fn: Optional[Callable[[np.ndarray, int, bool], float]] = None):
         super().__init__()
+        self._init_options(width, height, render_mode, copy_obs, auto_reset, reward_shape, reward_fn)
 
-        self.width = width
-        self.height = height
-        self.game_ptr = None # Pointer to the Rust Tetris object
-        self.render_mode = render_mode
-
-        if lib_path is None:
-            # Determine default library path based on OS and architecture
-            base_path = os.path.join(os.path.dirname(__file__), "target", "debug")
-            lib_name = ""
-            system = platform.system()
-            if system == "Linux":
-                lib_name = "libtetris_core.so"
-            elif system == "Windows":
-                lib_name = "tetris_core.dll"
-            elif system == "Darwin": # macOS
-                lib_name = "libtetris_core.dylib"
-            else:
-                raise OSError(f"Unsupported OS: {system}. Please provide lib_path manually.")
-            self.lib_path = os.path.join(base_path, lib_name)
-        else:
-            self.lib_path = lib_path
-
-        if not os.path.exists(self.lib_path):
-            raise OSError(f"Tetris library not found at {self.lib_path}. "
-                          "Ensure the Rust code is compiled and the path is correct.")
-
-        self.rust_lib = ctypes.CDLL(self.lib_path)
+        self.lib_path = _resolve_lib_path(lib_path)
+        self.rust_lib = _load_lib(self.lib_path)
         self._define_ffi_argtypes()
+        # Bound once so step() skips the CDLL attribute lookup; action ints are coerced via argtypes
+        if auto_reset and reward_fn is None:
+            self._c_step = self.rust_lib.tetris_step_autoreset
+        else:
+            self._c_step = self.rust_lib.tetris_step_rl
 
-        self.game_ptr = self.rust_lib.tetris_create(ctypes.c_uint32(self.width), ctypes.c_uint32(self.height))
+        self.game_ptr = self.rust_lib.tetris_create(self.width, self.height) # ints coerced via argtypes
         if not self.game_ptr:
             raise MemoryError("Failed to create Tetris game instance from Rust library.")
+        self.rust_lib.tetris_set_reward_shape(self.game_ptr, _reward_shape_id(reward_shape))
+
+        # Read-only view of the board buffer owned by the Rust game. Rust keeps it
+        # current on every step and reset, so observations need no FFI call or copy
+        # out of Rust. The buffer lives until close().
+        board_addr = self.rust_lib.tetris_board_ptr(self.game_ptr)
+        board_buf = (ctypes.c_uint8 * (self.height * self.width)).from_address(board_addr)
+        self._board = np.frombuffer(board_buf, dtype=np.uint8).reshape(self.height, self.width)
+        self._board.flags.writeable = False
+        self._reward = ctypes.c_double() # Filled by Rust with the reward of each step
+        self._reward_ref = ctypes.byref(self._reward)
+        self._last_state = None # Most recent (score, lost, width, height), reused by _get_info
+        self._init_spaces()
+
+        # Initial reset to set up state
+        # obs, info = self.reset()
+        # print(f"Initial state: obs shape {obs.shape}, info {info}")
 
+    def _init_options(self, width, height, render_mode, copy_obs, auto_reset, reward_shape, reward_fn):
+        # Constructor options shared with NativeTetrisEnv. The handles are set first,
+        # so close() from __del__ works even if a later check raises.
+        self.width = width
+        self.height = height
+        self.game_ptr = None # Pointer to the Rust Tetris object
+        self.render_mode = render_mode
+        self._render_thread = None # Started on the first human-mode render
+        # If False, observations are read-only views of the board buffer owned by
+        # Rust, which the next reset()/step() overwrites and close() frees; copy
+        # them yourself if you keep them around, and never read one after close().
+        self.copy_obs = copy_obs
+        # If True, a step that ends the game resets it inside Rust: it still returns
+        # terminated=True with the final reward and info, but the observation is
+        # the first board of the new game, so reset() is only needed once.
+        self.auto_reset = auto_reset
+        # Rewards: reward_shape picks one of REWARD_SHAPES, computed in Rust with the
+        # per-step and game over penalties included. reward_fn(board, score_delta, lost)
+        # replaces it entirely; it gets the read-only board view, so a Numba @njit
+        # function keeps the computation out of the interpreter. With auto_reset it
+        # still sees the board that lost; the reset then happens from Python.
+        _reward_shape_id(reward_shape)
+        self.reward_shape = reward_shape
+        self.reward_fn = reward_fn
+        self._prev_score = 0 # Score before the last step, only tracked for reward_fn
+
+    def _init_spaces(self):
         # Define action and observation spaces
         # 0:left, 1:right, 2:rotate, 3:drop, 4:tick (move down)
+        # step() forwards actions unchecked; out-of-range values wrap modulo 5 in Rust
         self.action_space = spaces.Discrete(5)
         self.observation_space = spaces.Box(
             low=0, high=1, shape=(self.height, self.width), dtype=np.uint8
         )
-
-        # Initial reset to set up state
-        # obs, info = self.reset()
-        # print(f"Initial state: obs shape {obs.shape}, info {info}")
-
+        # Bound sampler for rollout loops; draws from action_space's RNG
+        self.sample_action = self.action_space.sample
+        # Fixed part of the step info dict; step() only fills score and lost. Copying
+        # it is cheaper than a 4-key literal and than a NamedTuple, and gymnasium
+        # requires info to be a real dict.
+        self._info_template = {"score": 0, "lost": False, "width": self.width, "height": self.height}
+        self._init_render_buffers()
+
+    def _init_render_buffers(self):
+        # Renders map cells through a byte lookup table into a preallocated buffer
+        # with one byte row per board row, whose last column is a newline.
+        # ANSI: '.'/'#', one byte per cell.
+        self._ansi_lut = np.array([ord('.'), ord('#')], dtype=np.uint8)
+        self._ansi_buf = np.full((self.height, self.width + 1), ord('\n'), dtype=np.uint8)
+        # Human: UTF-8 encoded '⬛️'/'⬜️' (6 bytes each).
+        self._human_lut = np.frombuffer("⬛️⬜️".encode(), dtype=np.uint8).reshape(2, -1)
+        self._human_buf = np.full((self.height, self.width * self._human_lut.shape[1] + 1), ord('\n'),
+                                  dtype=np.uint8)
 
     def _define_ffi_argtypes(self):
         # tetris_create(width: u32, height: u32) -> *mut Tetris
@@ -82,6 +200,36 @@ class TetrisEnv(gym.Env):
         self.rust_lib.tetris_step.restype = GameState
         self.rust_lib.tetris_step.argtypes = [ctypes.c_void_p, ctypes.c_uint32]
 
+        # tetris_step_rl(ptr: *mut Tetris, action: u32, out_board_buffer: *mut u8,
+        #                out_reward: *mut f64) -> u64
+        # Returns score | lost << 32 | width << 33 | height << 48, see _decode_state
+        self.rust_lib.tetris_step_rl.restype = ctypes.c_uint64
+        self.rust_lib.tetris_step_rl.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_uint32,
+            ctypes.POINTER(ctypes.c_uint8), # *mut u8
+            ctypes.POINTER(ctypes.c_double), # *mut f64
+        ]
+
+        # tetris_step_autoreset: same signature as tetris_step_rl
+        self.rust_lib.tetris_step_autoreset.restype = ctypes.c_uint64
+        self.rust_lib.tetris_step_autoreset.argtypes = self.rust_lib.tetris_step_rl.argtypes
+
+        # tetris_batch_step(handles: *const *mut Tetris, actions: *const u32,
+        #                   out_boards: *mut u8, out_states: *mut GameState,
+        #                   out_rewards: *mut f64, auto_reset: bool, packed: bool, n: u32)
+        self.rust_lib.tetris_batch_step.restype = None
+        self.rust_lib.tetris_batch_step.argtypes = [
+            ctypes.POINTER(ctypes.c_void_p),
+            ctypes.POINTER(ctypes.c_uint32),
+            ctypes.POINTER(ctypes.c_uint8),
+            ctypes.POINTER(GameState),
+            ctypes.POINTER(ctypes.c_double),
+            ctypes.c_bool,
+            ctypes.c_bool,
+            ctypes.c_uint32,
+        ]
+
         # tetris_get_board(ptr: *const Tetris, out_board_buffer: *mut u8)
         self.rust_lib.tetris_get_board.restype = None
         self.rust_lib.tetris_get_board.argtypes = [
@@ -89,39 +237,59 @@ class TetrisEnv(gym.Env):
             ctypes.POINTER(ctypes.c_uint8), # *mut u8
         ]
 
+        # tetris_get_board_packed(ptr: *const Tetris, out_packed_buffer: *mut u8)
+        self.rust_lib.tetris_get_board_packed.restype = None
+        self.rust_lib.tetris_get_board_packed.argtypes = [
+            ctypes.c_void_p,
+            ctypes.POINTER(ctypes.c_uint8), # *mut u8, ceil(width * height / 8) bytes
+        ]
+
+        # tetris_board_ptr(ptr: *const Tetris) -> *const u8
+        self.rust_lib.tetris_board_ptr.restype = ctypes.c_void_p
+        self.rust_lib.tetris_board_ptr.argtypes = [ctypes.c_void_p]
+
+        # tetris_set_reward_shape(ptr: *mut Tetris, shape_id: u32)
+        self.rust_lib.tetris_set_reward_shape.restype = None
+        self.rust_lib.tetris_set_reward_shape.argtypes = [ctypes.c_void_p, ctypes.c_uint32]
+
         # tetris_get_game_state(ptr: *const Tetris) -> GameState
         self.rust_lib.tetris_get_game_state.restype = GameState
         self.rust_lib.tetris_get_game_state.argtypes = [ctypes.c_void_p]
 
+        # Hoist the entry points used on hot paths, so calls skip the CDLL attribute lookup
+        self._c_reset = self.rust_lib.tetris_reset
+        self._c_get_board = self.rust_lib.tetris_get_board
+        self._c_get_state = self.rust_lib.tetris_get_game_state
+        self._c_batch_step = self.rust_lib.tetris_batch_step
+
     def _get_obs(self) -> np.ndarray:
         if not self.game_ptr:
             # Return a zeroed observation if game_ptr is None, e.g. after close()
             return np.zeros(shape=(self.height, self.width), dtype=np.uint8)
 
-        board_size = self.height * self.width
-        # Create a flat buffer for the board data
-        board_buffer = (ctypes.c_uint8 * board_size)()
+        return self._board.copy() if self.copy_obs else self._board
 
-        self.rust_lib.tetris_get_board(
-            self.game_ptr,
-            board_buffer # ctypes automatically converts array to pointer
-        )
+    def _get_obs_view(self) -> np.ndarray:
+        # Same as _get_obs but returns the internal buffer without copying.
+        # Only for internal read-only callers (e.g. render); the contents are
+        # overwritten by the next observation.
+        if not self.game_ptr:
+            return np.zeros(shape=(self.height, self.width), dtype=np.uint8)
 
-        # Convert the ctypes array to a NumPy array and reshape
-        obs = np.ctypeslib.as_array(board_buffer).reshape(self.height, self.width)
-        return obs.copy() # Return a copy to avoid issues with buffer reuse
+        return self._board
 
     def _get_info(self) -> dict:
         if not self.game_ptr:
             return {"score": 0, "lost": True, "width": self.width, "height": self.height}
 
-        state_struct = self.rust_lib.tetris_get_game_state(self.game_ptr)
-        return {
-            "score": state_struct.score,
-            "lost": state_struct.lost,
-            "width": state_struct.width,
-            "height": state_struct.height,
-        }
+        if self._last_state is None:
+            self._fetch_state()
+        score, lost, width, height = self._last_state
+        return {"score": score, "lost": lost, "width": width, "height": height}
+
+    def _fetch_state(self):
+        state_struct = self._c_get_state(self.game_ptr)
+        self._last_state = (state_struct.score, state_struct.lost, state_struct.width, state_struct.height)
 
     def reset(self, seed=None, options=None) -> tuple[np.ndarray, dict]:
         super().reset(seed=seed) # Handles seed if necessary for future reproducibility
@@ -131,7 +299,9 @@ class TetrisEnv(gym.Env):
              # but as a safeguard if reset is called after close.
             raise ConnectionError("Rust game instance not available. Cannot reset.")
 
-        self.rust_lib.tetris_reset(self.game_ptr)
+        self._c_reset(self.game_ptr)
+        self._fetch_state()
+        self._prev_score = self._last_state[0]
 
         observation = self._get_obs()
         info = self._get_info()
@@ -145,44 +315,30 @@ class TetrisEnv(gym.Env):
         if not self.game_ptr:
             raise ConnectionError("Rust game instance not available. Cannot step.")
 
-        # Get current score for reward calculation
-        prev_game_state = self.rust_lib.tetris_get_game_state(self.game_ptr)
-
-        # Perform the action
-        new_game_state_struct = self.rust_lib.tetris_step(self.game_ptr, ctypes.c_uint32(action))
-
-        observation = self._get_obs()
-        terminated = new_game_state_struct.lost
-
-        # Reward calculation
-        # Basic reward: score difference. Penalty for losing. Small penalty per step.
-        reward = float(new_game_state_struct.score - prev_game_state.score)
-
-        # Check if score is based on lines cleared (e.g. 1 point per line)
-        # If lines_cleared = new_game_state.score - prev_game_state.score,
-        # then reward can be lines_cleared ** 2 or similar for super-linear reward.
-        # For now, using simple score difference.
-        # Example: if a line clear gives 1 point, reward is 1. If 4 lines give 4 points, reward is 4.
-        # If one wants to reward based on lines_cleared^2, and score is 1 per line:
-        # lines_cleared = new_game_state.score - prev_game_state.score
-        # if lines_cleared > 0:
-        #    reward = float(lines_cleared ** 2) # e.g. 1, 4, 9, 16 for 1,2,3,4 lines
-        # else:
-        #    reward = 0.0 # No lines cleared
-
-        reward -= 0.01 # Small penalty per step to encourage efficiency
-
-        if terminated:
-            reward -= 100.0 # Large penalty for losing
+        # No range check here: Rust wraps any action modulo 5 (see Tetris::apply_action).
+        # Perform the action; Rust updates the board behind self._board itself (so no
+        # out buffer is passed) and writes the reward (score gained, -0.01 per step,
+        # -100 on loss) into self._reward
+        packed_state = self._c_step(self.game_ptr, action, None, self._reward_ref)
+        self._last_state = score, terminated, _, _ = _decode_state(packed_state)
+        reward = self._reward.value
+        if self.reward_fn is not None:
+            reward = float(self.reward_fn(self._board, score - self._prev_score, terminated))
+            self._prev_score = score
+            if terminated and self.auto_reset:
+                # Deferred from Rust (see __init__) so reward_fn saw the board that lost
+                self._c_reset(self.game_ptr)
+                self._prev_score = 0
+        if terminated and self.auto_reset:
+            self._last_state = None # Rust already started the next game; _get_info refetches it
+
+        observation = self._board.copy() if self.copy_obs else self._board
 
         truncated = False # Tetris typically doesn't truncate early unless a step limit is imposed
 
-        info = {
-            "score": new_game_state_struct.score,
-            "lost": new_game_state_struct.lost,
-            "width": new_game_state_struct.width,
-            "height": new_game_state_struct.height,
-        }
+        info = self._info_template.copy()
+        info["score"] = score
+        info["lost"] = terminated
 
         if self.render_mode == "human":
             self.render()
@@ -194,61 +350,279 @@ class TetrisEnv(gym.Env):
              print("No game instance to render.")
              return
 
-        obs = self._get_obs()
+        obs = self._get_obs_view()
         if self.render_mode == 'human':
             # Simple console print, replace # with block, . with empty
-            print("\033[H\033[J", end="") # Clear screen
-            for r in range(self.height):
-                row_str = "".join(["⬜️" if obs[r, c] == 1 else "⬛️" for c in range(self.width)])
-                print(row_str)
+            self._human_buf[:, :-1] = self._human_lut[obs].reshape(self.height, -1)
             info = self._get_info()
-            print(f"Score: {info['score']} | Lost: {info['lost']}")
-            print("-" * (self.width * 2)) # Separator line
+            separator = "-" * (self.width * 2)
+            status = f"Score: {info['score']} | Lost: {info['lost']}\n{separator}\n"
+            # Clear screen, then board, score line and separator line, as one UTF-8 frame
+            self._submit_frame(b"\033[H\033[J" + self._human_buf.tobytes() + status.encode())
         elif self.render_mode == 'ansi':
             # Could return a string representation for ANSI
             info = self._get_info()
-            board_str = "\n".join("".join(["#" if obs[r, c] == 1 else "." for c in range(self.width)]) for r in range(self.height))
+            self._ansi_buf[:, :self.width] = self._ansi_lut[obs]
+            board_str = self._ansi_buf.tobytes().decode('ascii')[:-1] # Drop the trailing newline
             return f"{board_str}\nScore: {info['score']} | Lost: {info['lost']}"
 
 
+    def _submit_frame(self, frame: bytes):
+        # Hands the frame to the writer thread so step() never blocks on terminal I/O.
+        # The queue holds one frame; a frame the writer hasn't picked up yet is dropped.
+        if self._render_thread is None:
+            self._render_queue = queue.Queue(maxsize=1)
+            self._render_thread = threading.Thread(target=_render_worker, args=(self._render_queue,), daemon=True)
+            self._render_thread.start()
+        try:
+            self._render_queue.put_nowait(frame)
+        except queue.Full:
+            try:
+                self._render_queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._render_queue.put_nowait(frame)
+
+    def _stop_render_thread(self):
+        if self._render_thread is not None:
+            if self._render_thread.is_alive():
+                # Lets the writer flush the last frame, then exit; bounded because close()
+                # also runs from __del__ and a stuck stdout must not hang it
+                try:
+                    self._render_queue.put(None, timeout=1.0)
+                    self._render_thread.join(timeout=1.0)
+                except queue.Full:
+                    pass
+            self._render_thread = None
+
     def close(self):
+        self._stop_render_thread()
         if self.game_ptr:
             self.rust_lib.tetris_destroy(self.game_ptr)
             self.game_ptr = None
+            self._board = None # Its memory was just freed by Rust
+            self._last_state = None
             # print("Tetris game instance destroyed.") # Optional: for debugging
 
     def __del__(self):
         self.close()
 
-if __name__ == '__main__':
-    # Example usage:
-    # Ensure the .so/.dll/.dylib is in target/debug/ relative to this script, or provide full path.
-    # For example, if tetris_env.py is in the root of your Rust project, and the lib is in target/debug.
+class VecTetrisEnv:
+    """Runs num_envs Tetris games in lockstep with a single FFI call per step.
+
+    Observations, rewards and flags are returned as stacked numpy arrays with a
+    leading num_envs axis. Rewards are computed in Rust as in TetrisEnv, with the
+    same reward_shape options; a Python reward_fn is not supported here. Unless
+    copy_obs is set, the returned observations are a view of an internal buffer
+    that the next reset()/step() overwrites.
+
+    With auto_reset (the default), a game lost on a step is reset in Rust within
+    the same call: its observation is the new game's first board, while its
+    terminated flag and info entries still describe the lost game.
+
+    With packed_obs, each observation is the board bit-packed row-major into
+    ceil(height * width / 8) bytes, 8x less to move and store per step;
+    unpack() restores the (height, width) boards.
+    """
+
+    metadata = TetrisEnv.metadata
+
+    def __init__(self, num_envs: int, lib_path: str = None, width: int = 10, height: int = 20,
+                 copy_obs: bool = False, auto_reset: bool = True, reward_shape: str = "score_delta",
+                 packed_obs: bool = False):
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.copy_obs = copy_obs # See TetrisEnv; off by default for batched rollouts
+        self.auto_reset = auto_reset
+        self.packed_obs = packed_obs
+        self._handles = None
+        shape_id = _reward_shape_id(reward_shape)
+        self.reward_shape = reward_shape
+
+        self.lib_path = _resolve_lib_path(lib_path)
+        self.rust_lib = _load_lib(self.lib_path)
+        self._define_ffi_argtypes()
+
+        games = [self.rust_lib.tetris_create(self.width, self.height) for _ in range(num_envs)]
+        if not all(games):
+            for game in filter(None, games):
+                self.rust_lib.tetris_destroy(game)
+            raise MemoryError("Failed to create Tetris game instances from Rust library.")
+        self._handles = (ctypes.c_void_p * num_envs)(*games)
+        for game in games:
+            self.rust_lib.tetris_set_reward_shape(game, shape_id)
+
+        # Preallocated buffers shared with Rust; step() only fills them in place.
+        if packed_obs:
+            board_shape = ((self.height * self.width + 7) // 8,)
+            self._c_read_board = self.rust_lib.tetris_get_board_packed
+        else:
+            board_shape = (self.height, self.width)
+            self._c_read_board = self._c_get_board
+        self._boards = np.zeros((num_envs, *board_shape), dtype=np.uint8)
+        self._boards_ptr = self._boards.ctypes.data_as(ctypes.POINTER(ctypes.c_uint8))
+        self._states = np.zeros(num_envs, dtype=_GAME_STATE_DTYPE)
+        self._states_ptr = self._states.ctypes.data_as(ctypes.POINTER(GameState))
+        self._actions = np.zeros(num_envs, dtype=np.uint32)
+        self._actions_ptr = self._actions.ctypes.data_as(ctypes.POINTER(ctypes.c_uint32))
+        self._rewards = np.zeros(num_envs, dtype=np.float64)
+        self._rewards_ptr = self._rewards.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
+
+        self.single_action_space = spaces.Discrete(5)
+        self.single_observation_space = spaces.Box(
+            low=0, high=255 if packed_obs else 1, shape=board_shape, dtype=np.uint8
+        )
+
+    _define_ffi_argtypes = TetrisEnv._define_ffi_argtypes
 
-    # Determine the path to the library dynamically based on script location
-    # Assumes the script is in the root of the project.
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    default_lib_path = None
+    def unpack(self, boards: np.ndarray) -> np.ndarray:
+        # Inverse of packed_obs: (..., packed bytes) -> (..., height, width) of 0/1
+        cells = np.unpackbits(boards, axis=-1, count=self.height * self.width)
+        return cells.reshape(*boards.shape[:-1], self.height, self.width)
 
-    # Construct path assuming 'target/debug/' relative to the script's directory
-    # This is a common setup if the Python script is in the root of the Rust project
-    rust_project_root = script_dir # Assuming script is at project root
+    def _observations(self) -> np.ndarray:
+        return self._boards.copy() if self.copy_obs else self._boards
 
-    # More robust: try to find target/debug relative to current working directory if it's the project root
-    # Or expect user to set an environment variable or pass it.
-    # For now, let's assume target/debug is in the same directory as the script or one level up if script is in a 'scripts' folder
+    def _infos(self) -> dict:
+        return {
+            "score": self._states["score"].copy(),
+            "lost": self._states["lost"].copy(),
+        }
+
+    def reset(self, seed=None, options=None) -> tuple[np.ndarray, dict]:
+        if not self._handles:
+            raise ConnectionError("Rust game instances not available. Cannot reset.")
 
-    # Try a common path structure: <project_root>/target/debug/libtetris_core.so
-    # If tetris_env.py is at project_root:
-    path_to_target_debug = os.path.join(rust_project_root, "target", "debug")
+        for i, game in enumerate(self._handles):
+            self._c_reset(game)
+            self._c_read_board(game, self._boards[i].ctypes.data_as(ctypes.POINTER(ctypes.c_uint8)))
+            state = self._c_get_state(game)
+            self._states[i] = (state.score, state.lost, state.width, state.height)
+
+        return self._observations(), self._infos()
+
+    def step(self, actions) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+        if not self._handles:
+            raise ConnectionError("Rust game instances not available. Cannot step.")
+
+        self._actions[:] = actions
+        self._c_batch_step(
+            self._handles, self._actions_ptr, self._boards_ptr, self._states_ptr,
+            self._rewards_ptr, self.auto_reset, self.packed_obs, self.num_envs
+        )
+
+        rewards = self._rewards.copy()
+        terminated = self._states["lost"].copy()
+        truncated = np.zeros(self.num_envs, dtype=bool)
+
+        return self._observations(), rewards, terminated, truncated, self._infos()
+
+    def close(self):
+        if self._handles:
+            for game in self._handles:
+                self.rust_lib.tetris_destroy(game)
+            self._handles = None
+
+    def __del__(self):
+        self.close()
+
+
+class NativeTetrisEnv(TetrisEnv):
+    """TetrisEnv backed by the tetris_core_py PyO3 extension instead of ctypes.
+
+    Build the extension with `maturin develop --release` inside tetris_core_py/.
+    Takes the same options as TetrisEnv except lib_path; observations are always
+    fresh arrays, so copy_obs is accepted but has no effect.
+    """
+
+    def __init__(self, width: int = 10, height: int = 20, render_mode: str = None,
+                 copy_obs: bool = True, auto_reset: bool = False, reward_shape: str = "score_delta",
+                 reward_fn: Optional[Callable[[np.ndarray, int, bool], float]] = None):
+        gym.Env.__init__(self)
+        self._init_options(width, height, render_mode, copy_obs, auto_reset, reward_shape, reward_fn)
+        self.lib_path = None
+        if _core is None:
+            raise ImportError("tetris_core_py is not installed. Build it with `maturin develop` "
+                              "in tetris_core_py/, or use TetrisEnv.")
+
+        self.game_ptr = _core.Game(self.width, self.height) # Handle to the native game
+        self.game_ptr.set_reward_shape(_reward_shape_id(reward_shape))
+        self._init_spaces()
+
+    def _get_obs(self) -> np.ndarray:
+        if not self.game_ptr:
+            return np.zeros(shape=(self.height, self.width), dtype=np.uint8)
+        return self.game_ptr.get_board() # Already a fresh array
+
+    _get_obs_view = _get_obs
+
+    def _get_info(self) -> dict:
+        if not self.game_ptr:
+            return {"score": 0, "lost": True, "width": self.width, "height": self.height}
+
+        score, lost, width, height = self.game_ptr.state()
+        return {"score": score, "lost": lost, "width": width, "height": height}
+
+    def reset(self, seed=None, options=None) -> tuple[np.ndarray, dict]:
+        gym.Env.reset(self, seed=seed)
+
+        if not self.game_ptr:
+            raise ConnectionError("Native game instance not available. Cannot reset.")
+
+        self.game_ptr.reset()
+
+        observation = self._get_obs()
+        info = self._get_info()
+        self._prev_score = info["score"]
+
+        if self.render_mode == "human":
+            self.render()
+
+        return observation, info
+
+    def step(self, action: int) -> tuple[np.ndarray, float, bool, bool, dict]:
+        if not self.game_ptr:
+            raise ConnectionError("Native game instance not available. Cannot step.")
+
+        # Same reward as TetrisEnv, computed in Rust by Tetris::take_reward
+        observation, score, terminated, reward = self.game_ptr.step(int(action))
+        if self.reward_fn is not None:
+            reward = float(self.reward_fn(observation, score - self._prev_score, terminated))
+            self._prev_score = score
+        if terminated and self.auto_reset:
+            self.game_ptr.reset()
+            self._prev_score = 0
+            observation = self.game_ptr.get_board()
+
+        info = self._info_template.copy()
+        info["score"] = score
+        info["lost"] = terminated
+
+        if self.render_mode == "human":
+            self.render()
+
+        return observation, reward, terminated, False, info
+
+    def close(self):
+        self._stop_render_thread()
+        self.game_ptr = None
+
+
+def make_env(lib_path: str = None, **kwargs) -> TetrisEnv:
+    """Returns a NativeTetrisEnv when the extension is installed, else the ctypes TetrisEnv."""
+    if _core is not None and lib_path is None:
+        return NativeTetrisEnv(**kwargs)
+    return TetrisEnv(lib_path=lib_path, **kwargs)
+
+
+if __name__ == '__main__':
+    # Example usage:
+    # Ensure the .so/.dll/.dylib is in target/debug/ relative to this script, or provide full path.
+    # For example, if tetris_env.py is in the root of your Rust project, and the lib is in target/debug.
 
-    system = platform.system()
-    if system == "Linux":
-        default_lib_path = os.path.join(path_to_target_debug, "libtetris_core.so")
-    elif system == "Windows":
-        default_lib_path = os.path.join(path_to_target_debug, "tetris_core.dll")
-    elif system == "Darwin": # macOS
-        default_lib_path = os.path.join(path_to_target_debug, "libtetris_core.dylib")
+    # Assumes the script is in the root of the project, next to target/debug/
+    default_lib_path = os.path.join(_DEFAULT_LIB_DIR, _DEFAULT_LIB) if _DEFAULT_LIB else None
 
     print(f"Attempting to load library from: {default_lib_path}")
 
@@ -264,7 +638,7 @@ if __name__ == '__main__':
         steps = 0
         try:
             for _ in range(1000): # Run for a number of steps
-                action = env.action_space.sample() # Sample a random action
+                action = env.sample_action() # Sample a random action
                 obs, reward, terminated, truncated, info = env.step(action)
                 total_reward += reward
                 steps +=1